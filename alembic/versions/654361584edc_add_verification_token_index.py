@@ -0,0 +1,37 @@
+"""add partial index on users.verification_token
+
+Revision ID: 654361584edc
+Revises: 25d814bc83ed
+Create Date: 2026-10-15 09:12:31.482107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '654361584edc'
+down_revision: Union[str, None] = '25d814bc83ed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # users.email and users.nickname already have unique indexes from the initial migration.
+    # CONCURRENTLY cannot run inside a transaction, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_verification_token',
+            'users',
+            ['verification_token'],
+            unique=False,
+            postgresql_where=sa.text('verification_token IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_verification_token', table_name='users', postgresql_concurrently=True)
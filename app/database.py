@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker
+from settings.config import settings
 
 Base = declarative_base()
 
@@ -10,9 +11,18 @@ class Database:
 
     @classmethod
     def initialize(cls, database_url: str, echo: bool = False):
-        """Initialize the async engine and sessionmaker."""
+        """Initialize the async engine and sessionmaker; the pool is sized from Settings."""
         if cls._engine is None:  # Ensure engine is created once
-            cls._engine = create_async_engine(database_url, echo=echo, future=True)
+            cls._engine = create_async_engine(
+                database_url,
+                echo=echo,
+                future=True,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout,
+                pool_recycle=settings.db_pool_recycle,
+                pool_pre_ping=True,
+            )
             cls._session_factory = sessionmaker(
                 bind=cls._engine, class_=AsyncSession, expire_on_commit=False, future=True
             )
@@ -23,3 +33,24 @@ class Database:
         if cls._session_factory is None:
             raise ValueError("Database not initialized. Call `initialize()` first.")
         return cls._session_factory
+
+
+class DbContextManager:
+    """Owns one AsyncSession and its transaction: commits once on success, rolls back on error."""
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or Database.get_session_factory()
+        self._session = None
+
+    async def __aenter__(self) -> AsyncSession:
+        self._session = self._session_factory()
+        return self._session
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                await self._session.commit()
+            else:
+                await self._session.rollback()
+        finally:
+            await self._session.close()
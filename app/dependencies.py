@@ -1,14 +1,17 @@
 from builtins import Exception, dict, str
+import logging
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import Database
+from app.database import DbContextManager
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
 from app.services.jwt_service import decode_token
 from settings.config import Settings
 from fastapi import Depends
 
+logger = logging.getLogger(__name__)
+
 def get_settings() -> Settings:
     """Return application settings."""
     return Settings()
@@ -18,14 +21,18 @@ def get_email_service() -> EmailService:
     return EmailService(template_manager=template_manager)
 
 async def get_db() -> AsyncSession:
-    """Dependency that provides a database session for each request."""
-    async_session_factory = Database.get_session_factory()
-    async with async_session_factory() as session:
+    """Dependency that provides a database session for each request and commits it once at the end."""
+    async with DbContextManager() as session:
         try:
             yield session
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-        
+        except HTTPException:
+            # Handled error responses (e.g. a 401 after a failed login) keep their writes.
+            await session.commit()
+            raise
+        except Exception:
+            # Rolled back by DbContextManager; the app-level exception handler returns a generic 500.
+            logger.exception("Unhandled error during request; rolling back the transaction.")
+            raise
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
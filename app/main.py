@@ -1,4 +1,6 @@
 from builtins import Exception
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI
 from starlette.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware  # Import the CORSMiddleware
@@ -31,6 +33,8 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     settings = get_settings()
+    # Password hashing runs in the default executor via asyncio.to_thread; size it explicitly.
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=settings.hash_thread_pool))
     Database.initialize(settings.database_url, settings.debug)
 
 @app.exception_handler(Exception)
@@ -20,17 +20,18 @@ Key Highlights:
 
 from builtins import dict, int, len, str
 from datetime import timedelta
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_current_user, get_db, get_email_service, require_role
 from app.schemas.pagination_schema import EnhancedPagination
 from app.schemas.token_schema import TokenResponse
 from app.schemas.user_schemas import LoginRequest, UserBase, UserCreate, UserListResponse, UserResponse, UserUpdate
-from app.services.user_service import UserService
+from app.services.user_service import DuplicateUserError, InvalidUserDataError, UserService
 from app.services.jwt_service import create_access_token
-from app.utils.link_generation import create_user_links, generate_pagination_links
+from app.utils.link_generation import create_user_links, generate_keyset_pagination_links, generate_pagination_links
 from app.dependencies import get_settings
 from app.services.email_service import EmailService
 router = APIRouter()
@@ -86,8 +87,12 @@ async def update_user(user_id: UUID, user_update: UserUpdate, request: Request,
     - **user_id**: UUID of the user to update.
     - **user_update**: UserUpdate model with updated user information.
     """
-    user_data = user_update.model_dump(exclude_unset=True)
-    updated_user = await UserService.update(db, user_id, user_data)
+    try:
+        updated_user = await UserService.update(db, user_id, user_update)
+    except DuplicateUserError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email or nickname already exists")
+    except InvalidUserDataError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid user data")
     if not updated_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
@@ -124,7 +129,7 @@ async def delete_user(user_id: UUID, db: AsyncSession = Depends(get_db), token:
 
 
 @router.post("/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["User Management Requires (Admin or Manager Roles)"], name="create_user")
-async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def create_user(user: UserCreate, request: Request, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Create a new user.
 
@@ -140,13 +145,14 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
     Returns:
     - UserResponse: The newly created user's information along with navigation links.
     """
-    existing_user = await UserService.get_by_email(db, user.email)
-    if existing_user:
+    try:
+        created_user = await UserService.create(db, user)
+    except DuplicateUserError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
-    
-    created_user = await UserService.create(db, user.model_dump(), email_service)
     if not created_user:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create user")
+    # Background tasks run after get_db has committed, so the link always points at a stored user.
+    background_tasks.add_task(UserService.send_verification_email, email_service, created_user)
     
     
     return UserResponse.model_construct(
@@ -169,35 +175,47 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
 async def list_users(
     request: Request,
     skip: int = 0,
-    limit: int = 10,
+    limit: int = Query(10, ge=1),
+    after_id: Optional[UUID] = None,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    total_users = await UserService.count(db)
-    users = await UserService.list_users(db, skip, limit)
+    total_users = await UserService.estimated_count(db)
+    users = await UserService.list_users(db, skip, limit, after_id=after_id)
 
     user_responses = [
-        UserResponse.model_validate(user) for user in users
+        UserResponse.model_construct(**user._mapping) for user in users
     ]
     
-    pagination_links = generate_pagination_links(request, skip, limit, total_users)
-    
+    if after_id is not None:
+        # Keyset mode: a full page means there may be more, continuing after its last item.
+        next_after_id = users[-1].id if len(users) == limit else None
+        pagination_links = generate_keyset_pagination_links(request, after_id, limit, next_after_id)
+        page = None
+    else:
+        pagination_links = generate_pagination_links(request, skip, limit, total_users)
+        page = skip // limit + 1
+
     # Construct the final response with pagination details
     return UserListResponse(
         items=user_responses,
         total=total_users,
-        page=skip // limit + 1,
+        page=page,
         size=len(user_responses),
-        links=pagination_links  # Ensure you have appropriate logic to create these links
+        links=pagination_links
     )
 
 
 @router.post("/register/", response_model=UserResponse, tags=["Login and Registration"])
-async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
-    user = await UserService.register_user(session, user_data.model_dump(), email_service)
+async def register(user_data: UserCreate, background_tasks: BackgroundTasks, session: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
+    try:
+        user = await UserService.register_user(session, user_data)
+    except DuplicateUserError:
+        raise HTTPException(status_code=400, detail="Email already exists")
     if user:
+        background_tasks.add_task(UserService.send_verification_email, email_service, user)
         return user
-    raise HTTPException(status_code=400, detail="Email already exists")
+    raise HTTPException(status_code=500, detail="Failed to create user")
 
 @router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
@@ -1,19 +1,21 @@
 from builtins import ValueError, any, bool, str
-from pydantic import BaseModel, EmailStr, Field, validator, root_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, root_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 import uuid
 import re
 from app.models.user_model import UserRole
+from app.schemas.pagination_schema import PaginationLink
 from app.utils.nickname_gen import generate_nickname
 
 
+_URL_RE = re.compile(r'^https?:\/\/[^\s/$.?#].[^\s]*$')
+
 def validate_url(url: Optional[str]) -> Optional[str]:
     if url is None:
         return url
-    url_regex = r'^https?:\/\/[^\s/$.?#].[^\s]*$'
-    if not re.match(url_regex, url):
+    if not _URL_RE.match(url):
         raise ValueError('Invalid URL format')
     return url
 
@@ -28,7 +30,7 @@ class UserBase(BaseModel):
     github_profile_url: Optional[str] = Field(None, example="https://github.com/johndoe")
     role: UserRole
 
-    _validate_urls = validator('profile_picture_url', 'linkedin_profile_url', 'github_profile_url', pre=True, allow_reuse=True)(validate_url)
+    _validate_urls = field_validator('profile_picture_url', 'linkedin_profile_url', 'github_profile_url', mode='before')(validate_url)
  
     class Config:
         from_attributes = True
@@ -79,5 +81,6 @@ class UserListResponse(BaseModel):
         "github_profile_url": "https://github.com/johndoe"
     }])
     total: int = Field(..., example=100)
-    page: int = Field(..., example=1)
+    page: Optional[int] = Field(None, example=1, description="Page number; not reported for keyset (after_id) pagination.")
     size: int = Field(..., example=10)
+    links: List[PaginationLink] = Field(default_factory=list)
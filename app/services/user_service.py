@@ -1,16 +1,19 @@
-from builtins import Exception, bool, classmethod, int, str
-from datetime import datetime, timezone
+from builtins import Exception, bool, classmethod, int, range, str
+import asyncio
 import secrets
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Union
 from pydantic import ValidationError
-from sqlalchemy import func, null, update, select
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import Row, case, func, null, update, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
 from app.dependencies import get_email_service, get_settings
 from app.models.user_model import User
 from app.schemas.user_schemas import UserCreate, UserUpdate
 from app.utils.nickname_gen import generate_nickname
-from app.utils.security import generate_verification_token, hash_password, verify_password
+from app.utils.security import DUMMY_PASSWORD_HASH, generate_verification_token, hash_password, password_needs_rehash, verify_password
 from uuid import UUID
 from app.services.email_service import EmailService
 from app.models.user_model import UserRole
@@ -19,26 +22,82 @@ import logging
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-class UserService:
-    @classmethod
-    async def _execute_query(cls, session: AsyncSession, query):
-        try:
-            result = await session.execute(query)
-            await session.commit()
-            return result
-        except SQLAlchemyError as e:
-            logger.error(f"Database error: {e}")
-            await session.rollback()
-            return None
+NICKNAME_INSERT_ATTEMPTS = 3
+NICKNAME_BATCH_SIZE = 8
+
+# Below this many (estimated) rows list endpoints report an exact user count.
+EXACT_COUNT_THRESHOLD = 10000
+
+# Columns returned by list_users; mirrors the fields of UserResponse.
+USER_LIST_COLUMNS = (
+    User.__table__.c.id,
+    User.__table__.c.email,
+    User.__table__.c.nickname,
+    User.__table__.c.first_name,
+    User.__table__.c.last_name,
+    User.__table__.c.bio,
+    User.__table__.c.profile_picture_url,
+    User.__table__.c.linkedin_profile_url,
+    User.__table__.c.github_profile_url,
+    User.__table__.c.role,
+    User.__table__.c.is_professional,
+)
+
+# Flips to True once the users table is known to be non-empty; it never goes back,
+# so a False/None value always falls through to the database check.
+_admin_created: Optional[bool] = None
+
+# SQLSTATE PostgreSQL reports for a unique index violation.
+UNIQUE_VIOLATION = '23505'
+
 
+class DuplicateUserError(Exception):
+    """Raised when a user's email or nickname is already taken by another user."""
+
+
+class InvalidUserDataError(Exception):
+    """Raised when user values break a database constraint other than uniqueness, e.g. a required field set to null."""
+
+
+class UserService:
     @classmethod
     async def _fetch_user(cls, session: AsyncSession, **filters) -> Optional[User]:
         query = select(User).filter_by(**filters)
-        result = await cls._execute_query(session, query)
-        return result.scalars().first() if result else None
+        result = await session.execute(query)
+        return result.scalars().first()
+
+    @classmethod
+    async def _fetch_user_for_auth(cls, session: AsyncSession, email: str) -> Optional[User]:
+        """
+        Fetch only the columns needed to authenticate a user and issue their token.
+
+        Every other column raises on access instead of lazy-loading (which would fail under
+        AsyncSession with MissingGreenlet); use ``get_by_email``/``get_by_id`` for the full row.
+        """
+        query = select(User).options(
+            load_only(
+                User.id,
+                User.email,
+                User.hashed_password,
+                User.is_locked,
+                User.failed_login_attempts,
+                User.email_verified,
+                User.last_login_at,
+                User.created_at,
+                User.role,
+                raiseload=True,
+            )
+        ).where(User.email == email)
+        result = await session.execute(query)
+        return result.scalars().first()
 
     @classmethod
     async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
+        if not isinstance(user_id, UUID):
+            try:
+                user_id = UUID(str(user_id))
+            except ValueError:
+                return None  # A malformed id cannot match any user.
         return await cls._fetch_user(session, id=user_id)
 
     @classmethod
@@ -50,54 +109,114 @@ class UserService:
         return await cls._fetch_user(session, email=email)
 
     @classmethod
-    async def create(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
-        try:
-            validated_data = UserCreate(**user_data).model_dump()
-            existing_user = await cls.get_by_email(session, validated_data['email'])
-            if existing_user:
-                logger.error("User with given email already exists.")
-                return None
-            validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            new_user = User(**validated_data)
-            new_nickname = generate_nickname()
-            while await cls.get_by_nickname(session, new_nickname):
-                new_nickname = generate_nickname()
-            new_user.nickname = new_nickname
-            logger.info(f"User Role: {new_user.role}")
-            user_count = await cls.count(session)
-            new_user.role = UserRole.ADMIN if user_count == 0 else UserRole.ANONYMOUS            
-            if new_user.role == UserRole.ADMIN:
-                new_user.email_verified = True
+    async def create(cls, session: AsyncSession, user_data: Union[UserCreate, Dict[str, str]]) -> Optional[User]:
+        """
+        Insert a new user; the first user becomes ADMIN, later ones ANONYMOUS with a verification token.
+
+        Nothing is committed or emailed here: callers send the verification email once the
+        transaction has committed (see ``send_verification_email``).
 
+        Raises DuplicateUserError if the email is taken; returns None if the data is invalid or
+        no free nickname was found.
+        """
+        try:
+            # Routes hand over an already validated UserCreate; only raw dicts need validating here.
+            user_create = user_data if isinstance(user_data, UserCreate) else UserCreate.model_validate(user_data)
+            validated_data = user_create.model_dump(exclude_none=True)
+            validated_data['hashed_password'] = await asyncio.to_thread(hash_password, validated_data.pop('password'))
+            admin_exists = await cls._admin_bootstrapped(session)
+            validated_data['role'] = UserRole.ANONYMOUS if admin_exists else UserRole.ADMIN
+            logger.info(f"User Role: {validated_data['role']}")
+            if validated_data['role'] == UserRole.ADMIN:
+                validated_data['email_verified'] = True
             else:
-                new_user.verification_token = generate_verification_token()
-                await email_service.send_verification_email(new_user)
+                validated_data['verification_token'] = generate_verification_token()
+
+            new_user = None
+            nickname = generate_nickname()
+            for _ in range(NICKNAME_INSERT_ATTEMPTS):
+                validated_data['nickname'] = nickname
+                # ON CONFLICT without a target covers both the email and nickname unique indexes.
+                query = (
+                    pg_insert(User)
+                    .values(**validated_data)
+                    .on_conflict_do_nothing()
+                    .returning(User)
+                )
+                result = await session.execute(query)
+                new_user = result.scalar_one_or_none()
+                if new_user is not None:
+                    break
+                if await cls.get_by_email(session, validated_data['email']):
+                    logger.error("User with given email already exists.")
+                    raise DuplicateUserError("Email already exists")
+                nickname = await cls._pick_free_nickname(session)
+            if new_user is None:
+                logger.error("Could not generate a unique nickname for the new user.")
+                return None
 
-            session.add(new_user)
-            await session.commit()
             return new_user
         except ValidationError as e:
             logger.error(f"Validation error during user creation: {e}")
             return None
 
     @classmethod
-    async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str]) -> Optional[User]:
+    async def _pick_free_nickname(cls, session: AsyncSession) -> str:
+        """Generate a batch of nicknames and return one that is not taken, checked in a single query."""
+        candidates = [generate_nickname() for _ in range(NICKNAME_BATCH_SIZE)]
+        query = select(User.nickname).where(User.nickname.in_(candidates))
+        result = await session.execute(query)
+        taken = set(result.scalars().all())
+        for candidate in candidates:
+            if candidate not in taken:
+                return candidate
+        # Whole batch collided; let the ON CONFLICT insert sort it out on the next attempt.
+        return generate_nickname()
+
+    @classmethod
+    async def update(cls, session: AsyncSession, user_id: UUID, update_data: Union[UserUpdate, Dict[str, str]]) -> Optional[User]:
         try:
-            # validated_data = UserUpdate(**update_data).dict(exclude_unset=True)
-            validated_data = UserUpdate(**update_data).model_dump(exclude_unset=True)
+            user_update = update_data if isinstance(update_data, UserUpdate) else UserUpdate.model_validate(update_data)
+            validated_data = user_update.model_dump(exclude_unset=True)
 
             if 'password' in validated_data:
-                validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            query = update(User).where(User.id == user_id).values(**validated_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-            updated_user = await cls.get_by_id(session, user_id)
-            if updated_user:
-                session.refresh(updated_user)  # Explicitly refresh the updated user object
-                logger.info(f"User {user_id} updated successfully.")
-                return updated_user
-            else:
-                logger.error(f"User {user_id} not found after update attempt.")
-            return None
+                validated_data['hashed_password'] = await asyncio.to_thread(hash_password, validated_data.pop('password'))
+            if validated_data.get('role') is not None:
+                # "evaluate" copies values onto loaded instances as-is, so they must already be enum members.
+                validated_data['role'] = UserRole(validated_data['role'])
+            query = (
+                update(User)
+                .where(User.id == user_id)
+                .values(**validated_data)
+                .returning(User, User.updated_at)
+                # "evaluate" applies the new values to already-loaded instances in Python;
+                # "fetch" would cost an extra SELECT and False would leave them stale.
+                .execution_options(synchronize_session="evaluate")
+            )
+            try:
+                # A savepoint keeps the request transaction usable when the UPDATE hits a constraint.
+                async with session.begin_nested():
+                    result = await session.execute(query)
+                    row = result.one_or_none()
+            except IntegrityError as e:
+                logger.error(f"Constraint violation during update of user {user_id}: {e.orig}")
+                if getattr(e.orig, 'pgcode', None) == UNIQUE_VIOLATION:
+                    raise DuplicateUserError("Email or nickname already exists") from e
+                raise InvalidUserDataError("Invalid user data") from e
+            if row is None:
+                logger.error(f"User {user_id} not found during update attempt.")
+                return None
+            updated_user, updated_at = row
+            # updated_at comes from the column's onupdate=func.now(), which "evaluate" cannot compute.
+            set_committed_value(updated_user, 'updated_at', updated_at)
+            logger.info(f"User {user_id} updated successfully.")
+            return updated_user
+        except (DuplicateUserError, InvalidUserDataError):
+            raise
+        except SQLAlchemyError as e:
+            # Left to the request's DbContextManager, which rolls the whole transaction back.
+            logger.error(f"Database error during user update: {e}")
+            raise
         except Exception as e:  # Broad exception handling for debugging
             logger.error(f"Error during user update: {e}")
             return None
@@ -109,72 +228,159 @@ class UserService:
             logger.info(f"User with ID {user_id} not found.")
             return False
         await session.delete(user)
-        await session.commit()
+        await session.flush()
         return True
 
     @classmethod
-    async def list_users(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> List[User]:
-        query = select(User).offset(skip).limit(limit)
-        result = await cls._execute_query(session, query)
-        return result.scalars().all() if result else []
+    async def list_users(
+        cls, session: AsyncSession, skip: int = 0, limit: int = 10, after_id: Optional[UUID] = None
+    ) -> List[Row]:
+        """
+        List users as plain Core rows holding only the columns exposed by UserResponse.
+
+        Pages are bounded by ``limit``, so the rows are fetched in one go rather than through
+        a server-side cursor; the saving comes from skipping ORM entity construction.
+
+        Rows are ordered by id. When ``after_id`` is given the page starts right after that id
+        (keyset pagination) and ``skip`` is ignored, so deep pages cost the same as the first one.
+
+        :param session: The AsyncSession instance for database access.
+        :param skip: Number of users to skip (offset pagination).
+        :param limit: Maximum number of users to return.
+        :param after_id: Id of the last user of the previous page (keyset pagination).
+        :return: Rows that can be fed to ``UserResponse.model_construct(**row._mapping)``.
+        """
+        query = select(*USER_LIST_COLUMNS).order_by(User.__table__.c.id).limit(limit)
+        if after_id is not None:
+            query = query.where(User.__table__.c.id > after_id)
+        else:
+            query = query.offset(skip)
+        result = await session.execute(query)
+        return result.all()
 
     @classmethod
-    async def register_user(cls, session: AsyncSession, user_data: Dict[str, str], get_email_service) -> Optional[User]:
-        return await cls.create(session, user_data, get_email_service)
+    async def register_user(cls, session: AsyncSession, user_data: Union[UserCreate, Dict[str, str]]) -> Optional[User]:
+        return await cls.create(session, user_data)
+
+    @classmethod
+    async def send_verification_email(cls, email_service: EmailService, user: User) -> None:
+        """Email the verification link to a newly created user; call only after the user is committed."""
+        if user.verification_token is not None:
+            await email_service.send_verification_email(user)
     
 
     @classmethod
     async def login_user(cls, session: AsyncSession, email: str, password: str) -> Optional[User]:
-        user = await cls.get_by_email(session, email)
-        if user:
-            if user.email_verified is False:
-                return None
-            if user.is_locked:
-                return None
-            if verify_password(password, user.hashed_password):
-                user.failed_login_attempts = 0
-                user.last_login_at = datetime.now(timezone.utc)
-                session.add(user)
-                await session.commit()
-                return user
-            else:
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= settings.max_login_attempts:
-                    user.is_locked = True
-                session.add(user)
-                await session.commit()
+        """
+        Authenticate a user by email and password.
+
+        :param session: The AsyncSession instance for database access.
+        :param email: The email to log in with.
+        :param password: The plain text password.
+        :return: The authenticated user, or None. The user is partially loaded: only id, email, role,
+            hashed_password, is_locked, failed_login_attempts, email_verified, last_login_at and
+            created_at are available; reading any other attribute raises InvalidRequestError.
+        """
+        user = await cls._fetch_user_for_auth(session, email)
+        if user is None:
+            # Same hashing work as a wrong password, so response time does not reveal which emails exist.
+            await asyncio.to_thread(verify_password, password, DUMMY_PASSWORD_HASH)
+            return None
+        if user.email_verified is False:
+            return None
+        if user.is_locked:
+            return None
+        if await asyncio.to_thread(verify_password, password, user.hashed_password):
+            values = {"failed_login_attempts": 0, "last_login_at": func.now()}
+            if password_needs_rehash(user.hashed_password):
+                # Legacy bcrypt or outdated argon2 parameters: upgrade while the plain password is at hand.
+                values["hashed_password"] = await asyncio.to_thread(hash_password, password)
+            query = (
+                update(User)
+                .where(User.id == user.id)
+                .values(**values)
+                .returning(User.failed_login_attempts, User.last_login_at, User.hashed_password)
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.execute(query)
+            cls._sync_user(user, result.one())
+            return user
+        query = (
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                failed_login_attempts=User.failed_login_attempts + 1,
+                is_locked=case(
+                    (User.failed_login_attempts + 1 >= settings.max_login_attempts, True),
+                    else_=User.is_locked,
+                ),
+            )
+            .returning(User.failed_login_attempts, User.is_locked)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(query)
+        cls._sync_user(user, result.one())
         return None
 
+    @classmethod
+    def _sync_user(cls, user: User, row: Row) -> None:
+        """Copy values returned by an UPDATE onto an already-loaded user without marking it dirty."""
+        for key, value in row._mapping.items():
+            set_committed_value(user, key, value)
+
     @classmethod
     async def is_account_locked(cls, session: AsyncSession, email: str) -> bool:
-        user = await cls.get_by_email(session, email)
+        user = await cls._fetch_user_for_auth(session, email)
         return user.is_locked if user else False
 
 
     @classmethod
     async def reset_password(cls, session: AsyncSession, user_id: UUID, new_password: str) -> bool:
-        hashed_password = hash_password(new_password)
+        hashed_password = await asyncio.to_thread(hash_password, new_password)
         user = await cls.get_by_id(session, user_id)
         if user:
             user.hashed_password = hashed_password
             user.failed_login_attempts = 0  # Resetting failed login attempts
             user.is_locked = False  # Unlocking the user account, if locked
             session.add(user)
-            await session.commit()
+            await session.flush()
             return True
         return False
 
     @classmethod
     async def verify_email_with_token(cls, session: AsyncSession, user_id: UUID, token: str) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if user and user.verification_token == token:
-            user.email_verified = True
-            user.verification_token = None  # Clear the token once used
-            user.role = UserRole.AUTHENTICATED
-            session.add(user)
-            await session.commit()
+        # The token is matched inside the UPDATE, so lookup, comparison and write are one atomic statement.
+        query = (
+            update(User)
+            .where(User.id == user_id, User.verification_token == token)
+            .values(email_verified=True, verification_token=None, role=UserRole.AUTHENTICATED)
+            .returning(User.id)
+            .execution_options(synchronize_session="evaluate")
+        )
+        result = await session.execute(query)
+        return result.scalar_one_or_none() is not None
+
+    @classmethod
+    async def _admin_bootstrapped(cls, session: AsyncSession) -> bool:
+        """
+        Check whether any user exists, caching a positive answer for the process lifetime.
+
+        :param session: The AsyncSession instance for database access.
+        :return: True if the users table already holds at least one row.
+        """
+        if _admin_created:
             return True
-        return False
+        query = select(select(User.id).limit(1).exists())
+        result = await session.execute(query)
+        exists = bool(result.scalar())
+        if exists:
+            cls._mark_admin_bootstrapped()
+        return exists
+
+    @classmethod
+    def _mark_admin_bootstrapped(cls) -> None:
+        global _admin_created
+        _admin_created = True
 
     @classmethod
     async def count(cls, session: AsyncSession) -> int:
@@ -186,8 +392,27 @@ class UserService:
         """
         query = select(func.count()).select_from(User)
         result = await session.execute(query)
-        count = result.scalar()
-        return count
+        return result.scalar()
+
+    @classmethod
+    async def estimated_count(cls, session: AsyncSession) -> int:
+        """
+        Estimate the number of users from the planner statistics in ``pg_class``.
+
+        Falls back to an exact count while the table is small or has never been analyzed,
+        where the estimate is either unreliable or no cheaper than counting.
+
+        :param session: The AsyncSession instance for database access.
+        :return: The (estimated) count of users.
+        """
+        query = text("SELECT reltuples::bigint FROM pg_class WHERE oid = :table ::regclass").bindparams(
+            table=User.__tablename__
+        )
+        result = await session.execute(query)
+        estimate = result.scalar()
+        if estimate is None or estimate < EXACT_COUNT_THRESHOLD:
+            return await cls.count(session)
+        return estimate
     
     @classmethod
     async def unlock_user_account(cls, session: AsyncSession, user_id: UUID) -> bool:
@@ -196,6 +421,6 @@ class UserService:
             user.is_locked = False
             user.failed_login_attempts = 0  # Optionally reset failed login attempts
             session.add(user)
-            await session.commit()
+            await session.flush()
             return True
         return False
@@ -1,5 +1,5 @@
 from builtins import dict, int, max, str
-from typing import List, Callable
+from typing import List, Callable, Optional
 from urllib.parse import urlencode
 from uuid import UUID
 
@@ -13,9 +13,16 @@ def create_link(rel: str, href: str, method: str = "GET", action: str = None) ->
 
 def create_pagination_link(rel: str, base_url: str, params: dict) -> PaginationLink:
     # Ensure parameters are added in a specific order
-    query_string = f"skip={params['skip']}&limit={params['limit']}"
+    if 'after_id' in params:
+        query_string = f"after_id={params['after_id']}&limit={params['limit']}"
+    else:
+        query_string = f"skip={params['skip']}&limit={params['limit']}"
     return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
 
+def _base_url(request: Request) -> str:
+    # Pagination links carry their own query string, so drop the one of the current request.
+    return str(request.url).split('?', 1)[0]
+
 def create_user_links(user_id: UUID, request: Request) -> List[Link]:
     """
     Generate navigation links for user actions.
@@ -31,7 +38,7 @@ def create_user_links(user_id: UUID, request: Request) -> List[Link]:
     ]
 
 def generate_pagination_links(request: Request, skip: int, limit: int, total_items: int) -> List[PaginationLink]:
-    base_url = str(request.url)
+    base_url = _base_url(request)
     total_pages = (total_items + limit - 1) // limit
     links = [
         create_pagination_link("self", base_url, {'skip': skip, 'limit': limit}),
@@ -46,3 +53,18 @@ def generate_pagination_links(request: Request, skip: int, limit: int, total_ite
         links.append(create_pagination_link("prev", base_url, {'skip': max(skip - limit, 0), 'limit': limit}))
 
     return links
+
+
+def generate_keyset_pagination_links(request: Request, after_id: UUID, limit: int, next_after_id: Optional[UUID]) -> List[PaginationLink]:
+    """
+    Links for keyset pagination: there is no page number, so only self, first and next are offered.
+    ``next_after_id`` is the id of the last item on this page, or None when this is the last page.
+    """
+    base_url = _base_url(request)
+    links = [
+        create_pagination_link("self", base_url, {'after_id': after_id, 'limit': limit}),
+        create_pagination_link("first", base_url, {'skip': 0, 'limit': limit}),
+    ]
+    if next_after_id is not None:
+        links.append(create_pagination_link("next", base_url, {'after_id': next_after_id, 'limit': limit}))
+    return links
@@ -1,19 +1,37 @@
 # app/security.py
 from builtins import Exception, ValueError, bool, int, str
 import secrets
-import bcrypt
+from typing import Optional
 from logging import getLogger
+import bcrypt
+from argon2 import PasswordHasher, Type
+from argon2.exceptions import VerifyMismatchError
+from settings.config import settings
 
 # Set up logging
 logger = getLogger(__name__)
 
-def hash_password(password: str, rounds: int = 12) -> str:
+# Hashes created before the switch to argon2id are bcrypt ($2a$/$2b$/$2y$); they still verify
+# and are rehashed on the next successful login.
+_BCRYPT_PREFIX = "$2"
+
+def _argon2_hasher(time_cost: int) -> PasswordHasher:
+    return PasswordHasher(
+        time_cost=time_cost,
+        memory_cost=settings.argon2_memory_kib,
+        parallelism=settings.argon2_parallelism,
+        type=Type.ID,
+    )
+
+_password_hasher = _argon2_hasher(settings.argon2_time_cost)
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """
-    Hashes a password using bcrypt with a specified cost factor.
+    Hashes a password using argon2id with the configured cost parameters.
     
     Args:
         password (str): The plain text password to hash.
-        rounds (int): The cost factor that determines the computational cost of hashing.
+        rounds (int): Optional argon2 time cost overriding ``settings.argon2_time_cost``.
 
     Returns:
         str: The hashed password.
@@ -22,9 +40,8 @@ def hash_password(password: str, rounds: int = 12) -> str:
         ValueError: If hashing the password fails.
     """
     try:
-        salt = bcrypt.gensalt(rounds=rounds)
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed_password.decode('utf-8')
+        hasher = _password_hasher if rounds is None else _argon2_hasher(rounds)
+        return hasher.hash(password)
     except Exception as e:
         logger.error("Failed to hash password: %s", e)
         raise ValueError("Failed to hash password") from e
@@ -35,7 +52,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     
     Args:
         plain_password (str): The plain text password to verify.
-        hashed_password (str): The bcrypt hashed password.
+        hashed_password (str): The argon2id (or legacy bcrypt) hashed password.
 
     Returns:
         bool: True if the password is correct, False otherwise.
@@ -44,10 +61,32 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         ValueError: If the hashed password format is incorrect or the function fails to verify.
     """
     try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        if hashed_password.startswith(_BCRYPT_PREFIX):
+            return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return _password_hasher.verify(hashed_password, plain_password)
+    except VerifyMismatchError:
+        return False
     except Exception as e:
         logger.error("Error verifying password: %s", e)
         raise ValueError("Authentication process encountered an unexpected error") from e
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Tells whether a stored hash should be replaced after a successful login.
+
+    Args:
+        hashed_password (str): The stored hash.
+
+    Returns:
+        bool: True for legacy bcrypt hashes and for argon2 hashes made with outdated cost parameters.
+    """
+    if hashed_password.startswith(_BCRYPT_PREFIX):
+        return True
+    return _password_hasher.check_needs_rehash(hashed_password)
+
+# Hashing at import loads the argon2 backend up front so the first login/signup doesn't pay for it;
+# the result doubles as the hash verified against for unknown emails.
+DUMMY_PASSWORD_HASH = hash_password("invalid")
+
 def generate_verification_token():
     return secrets.token_urlsafe(16)  # Generates a secure 16-byte URL-safe token
\ No newline at end of file
@@ -34,6 +34,7 @@ from app.models.user_model import User, UserRole
 from app.dependencies import get_db, get_settings
 from app.utils.security import hash_password
 from app.utils.template_manager import TemplateManager
+from app.services import user_service
 from app.services.email_service import EmailService
 from app.services.jwt_service import create_access_token
 
@@ -74,6 +75,8 @@ def initialize_database():
 # this function setup and tears down (drops tales) for each test function, so you have a clean database for each test.
 @pytest.fixture(scope="function", autouse=True)
 async def setup_database():
+    # the tables are recreated for every test, so the cached "users exist" flag must be too
+    user_service._admin_created = None
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
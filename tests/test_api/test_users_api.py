@@ -51,6 +51,14 @@ async def test_update_user_email_access_allowed(async_client, admin_user, admin_
     assert response.status_code == 200
     assert response.json()["email"] == updated_data["email"]
 
+@pytest.mark.asyncio
+async def test_update_user_email_already_taken(async_client, admin_user, verified_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.put(f"/users/{admin_user.id}", json={"email": verified_user.email}, headers=headers)
+    assert response.status_code == 409
+    assert "SQL" not in response.text
+    assert "UPDATE users" not in response.text
+
 
 @pytest.mark.asyncio
 async def test_delete_user(async_client, admin_user, admin_token):
@@ -72,6 +80,13 @@ async def test_create_user_duplicate_email(async_client, verified_user):
     assert response.status_code == 400
     assert "Email already exists" in response.json().get("detail", "")
 
+@pytest.mark.asyncio
+async def test_admin_create_user_duplicate_email(async_client, verified_user, admin_token):
+    user_data = {"email": verified_user.email, "password": "AnotherPassword123!", "role": UserRole.AUTHENTICATED.name}
+    response = await async_client.post("/users/", json=user_data, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already exists"
+
 @pytest.mark.asyncio
 async def test_create_user_invalid_email(async_client):
     user_data = {
@@ -175,6 +190,29 @@ async def test_list_users_as_admin(async_client, admin_token):
     assert response.status_code == 200
     assert 'items' in response.json()
 
+@pytest.mark.asyncio
+async def test_list_users_with_after_id(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    first_page = (await async_client.get("/users/?limit=10", headers=headers)).json()
+    last_id = first_page["items"][-1]["id"]
+
+    response = await async_client.get(f"/users/?after_id={last_id}&limit=10", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["page"] is None
+    assert all(item["id"] > last_id for item in body["items"])
+    links = {link["rel"]: link["href"] for link in body["links"]}
+    assert set(links) == {"self", "first", "next"}
+    assert links["next"].endswith(f"/users/?after_id={body['items'][-1]['id']}&limit=10")
+
+    next_page = (await async_client.get(links["next"], headers=headers)).json()
+    assert next_page["items"][0]["id"] > body["items"][-1]["id"]
+
+@pytest.mark.asyncio
+async def test_list_users_rejects_zero_limit(async_client, admin_token):
+    response = await async_client.get("/users/?limit=0", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 422
+
 @pytest.mark.asyncio
 async def test_list_users_as_manager(async_client, manager_token):
     response = await async_client.get(
@@ -0,0 +1,65 @@
+from builtins import RuntimeError
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.database import Database, DbContextManager
+from app.dependencies import get_db
+from app.main import app
+from app.models.user_model import User, UserRole
+from app.services.user_service import UserService
+
+# These tests go through the real get_db (no dependency override), so the request-scoped
+# commit/rollback in DbContextManager is what decides what ends up in the database.
+
+@pytest.fixture(autouse=True)
+async def dispose_app_engine():
+    yield
+    # Each test runs on its own event loop; pooled asyncpg connections cannot outlive it.
+    await Database._engine.dispose()
+
+def make_user(email: str) -> User:
+    return User(
+        nickname=email.split("@")[0],
+        email=email,
+        hashed_password="securepassword",
+        role=UserRole.AUTHENTICATED,
+    )
+
+async def fetch_user(email: str):
+    async with Database.get_session_factory()() as session:
+        result = await session.execute(select(User).filter_by(email=email))
+        return result.scalars().first()
+
+async def test_db_context_manager_commits_on_success():
+    async with DbContextManager() as session:
+        session.add(make_user("committed@example.com"))
+    assert await fetch_user("committed@example.com") is not None
+
+async def test_get_db_rolls_back_on_unhandled_error():
+    dependency = get_db()
+    session = await dependency.__anext__()
+    session.add(make_user("rolled_back@example.com"))
+    await session.flush()
+    # Re-raised untouched so the app-level exception handler, not get_db, shapes the 500.
+    with pytest.raises(RuntimeError):
+        await dependency.athrow(RuntimeError("Simulated failure"))
+    assert await fetch_user("rolled_back@example.com") is None
+
+async def test_unhandled_db_error_returns_generic_500(admin_user, admin_token, monkeypatch):
+    async def failing_get_by_id(session, user_id):
+        raise IntegrityError("UPDATE users SET email=$1", {"email": "taken@example.com"}, Exception("duplicate key"))
+    monkeypatch.setattr(UserService, "get_by_id", failing_get_by_id)
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        response = await client.get(f"/users/{admin_user.id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 500
+    assert response.json() == {"message": "An unexpected error occurred."}
+
+async def test_get_db_keeps_writes_of_handled_http_errors(verified_user):
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.post("/login/", data={"username": verified_user.email, "password": "WrongPassword!"})
+    assert response.status_code == 401
+    stored_user = await fetch_user(verified_user.email)
+    assert stored_user.failed_login_attempts == 1
@@ -108,3 +108,8 @@ def test_user_base_url_invalid(url, user_base_data):
     user_base_data["profile_picture_url"] = url
     with pytest.raises(ValidationError):
         UserBase(**user_base_data)
+
+@pytest.mark.parametrize("field", ["profile_picture_url", "linkedin_profile_url", "github_profile_url"])
+def test_user_update_url_invalid(field):
+    with pytest.raises(ValidationError):
+        UserUpdate(**{field: "http//invalid"})
@@ -1,24 +1,26 @@
 # test_security.py
 from builtins import RuntimeError, ValueError, isinstance, str
+import bcrypt
 import pytest
-from app.utils.security import hash_password, verify_password
+from app.utils.security import hash_password, password_needs_rehash, verify_password
 
 def test_hash_password():
-    """Test that hashing password returns a bcrypt hashed string."""
+    """Test that hashing password returns an argon2id hashed string."""
     password = "secure_password"
     hashed = hash_password(password)
     assert hashed is not None
     assert isinstance(hashed, str)
-    assert hashed.startswith('$2b$')
+    assert hashed.startswith('$argon2id$')
 
 def test_hash_password_with_different_rounds():
     """Test hashing with different cost factors."""
     password = "secure_password"
-    rounds = 10
-    hashed_10 = hash_password(password, rounds)
-    rounds = 12
-    hashed_12 = hash_password(password, rounds)
-    assert hashed_10 != hashed_12, "Hashes should differ with different cost factors"
+    rounds = 2
+    hashed_2 = hash_password(password, rounds)
+    rounds = 3
+    hashed_3 = hash_password(password, rounds)
+    assert hashed_2 != hashed_3, "Hashes should differ with different cost factors"
+    assert ",t=3," in hashed_3
 
 def test_verify_password_correct():
     """Test verifying the correct password."""
@@ -46,7 +48,7 @@ def test_verify_password_invalid_hash():
 def test_hash_password_edge_cases(password):
     """Test hashing various edge cases."""
     hashed = hash_password(password)
-    assert isinstance(hashed, str) and hashed.startswith('$2b$'), "Should handle edge cases properly"
+    assert isinstance(hashed, str) and hashed.startswith('$argon2id$'), "Should handle edge cases properly"
 
 def test_verify_password_edge_cases():
     """Test verifying passwords with edge cases."""
@@ -55,13 +57,26 @@ def test_verify_password_edge_cases():
     assert verify_password(password, hashed) is True
     assert verify_password("not empty", hashed) is False
 
-# This function tests the error handling when an internal error occurs in bcrypt
+def test_verify_password_legacy_bcrypt_hash():
+    """Test that hashes created with bcrypt before the argon2id switch still verify."""
+    legacy_hash = bcrypt.hashpw(b"secure_password", bcrypt.gensalt(rounds=4)).decode('utf-8')
+    assert verify_password("secure_password", legacy_hash) is True
+    assert verify_password("incorrect_password", legacy_hash) is False
+
+def test_password_needs_rehash():
+    """Test that legacy bcrypt and outdated argon2 hashes are flagged for rehashing."""
+    legacy_hash = bcrypt.hashpw(b"secure_password", bcrypt.gensalt(rounds=4)).decode('utf-8')
+    assert password_needs_rehash(legacy_hash) is True
+    assert password_needs_rehash(hash_password("secure_password", rounds=5)) is True
+    assert password_needs_rehash(hash_password("secure_password")) is False
+
+# This function tests the error handling when an internal error occurs in the hashing backend
 def test_hash_password_internal_error(monkeypatch):
-    """Test proper error handling when an internal bcrypt error occurs."""
-    def mock_bcrypt_gensalt(rounds):
+    """Test proper error handling when an internal hashing error occurs."""
+    def mock_hash(*args, **kwargs):
         raise RuntimeError("Simulated internal error")
 
-    monkeypatch.setattr("bcrypt.gensalt", mock_bcrypt_gensalt)
+    monkeypatch.setattr("argon2.PasswordHasher.hash", mock_hash)
     with pytest.raises(ValueError):
         hash_password("test")
 
@@ -1,35 +1,69 @@
 from builtins import range
+import bcrypt
 import pytest
 from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
 from app.dependencies import get_settings
 from app.models.user_model import User, UserRole
-from app.services.user_service import UserService
+from app.services.user_service import DuplicateUserError, InvalidUserDataError, UserService
 from app.utils.nickname_gen import generate_nickname
+from app.utils.security import verify_password
 
 pytestmark = pytest.mark.asyncio
 
 # Test creating a user with valid data
-async def test_create_user_with_valid_data(db_session, email_service):
+async def test_create_user_with_valid_data(db_session):
     user_data = {
         "nickname": generate_nickname(),
         "email": "valid_user@example.com",
         "password": "ValidPassword123!",
         "role": UserRole.ADMIN.name
     }
-    user = await UserService.create(db_session, user_data, email_service)
+    user = await UserService.create(db_session, user_data)
     assert user is not None
     assert user.email == user_data["email"]
 
+# Test that only users awaiting verification are emailed a link
+async def test_send_verification_email(db_session, email_service, admin_user, user):
+    user.verification_token = "valid_token_example"
+    await UserService.send_verification_email(email_service, admin_user)
+    email_service.send_verification_email.assert_not_called()
+    await UserService.send_verification_email(email_service, user)
+    email_service.send_verification_email.assert_awaited_once_with(user)
+
 # Test creating a user with invalid data
-async def test_create_user_with_invalid_data(db_session, email_service):
+async def test_create_user_with_invalid_data(db_session):
     user_data = {
         "nickname": "",  # Invalid nickname
         "email": "invalidemail",  # Invalid email
         "password": "short",  # Invalid password
     }
-    user = await UserService.create(db_session, user_data, email_service)
+    user = await UserService.create(db_session, user_data)
     assert user is None
 
+# Test creating a user with an email that is already taken
+async def test_create_user_with_duplicate_email(db_session, user):
+    user_data = {
+        "email": user.email,
+        "password": "ValidPassword123!",
+        "role": UserRole.AUTHENTICATED.name
+    }
+    with pytest.raises(DuplicateUserError):
+        await UserService.create(db_session, user_data)
+
+# Test that a nickname collision on create is resolved from a batch of free candidates
+async def test_create_user_with_taken_nickname(db_session, user, monkeypatch):
+    candidates = iter([user.nickname, user.nickname, "free_nickname_1"] + [generate_nickname() for _ in range(10)])
+    monkeypatch.setattr("app.services.user_service.generate_nickname", lambda: next(candidates))
+    user_data = {
+        "email": "nickname_collision@example.com",
+        "password": "ValidPassword123!",
+        "role": UserRole.AUTHENTICATED.name
+    }
+    new_user = await UserService.create(db_session, user_data)
+    assert new_user is not None
+    assert new_user.nickname == "free_nickname_1"
+
 # Test fetching a user by ID when the user exists
 async def test_get_by_id_user_exists(db_session, user):
     retrieved_user = await UserService.get_by_id(db_session, user.id)
@@ -68,11 +102,31 @@ async def test_update_user_valid_data(db_session, user):
     assert updated_user is not None
     assert updated_user.email == new_email
 
+# Test that updating a loaded user keeps the role an enum and refreshes updated_at
+async def test_update_user_role_and_timestamp(db_session, user):
+    previous_updated_at = user.updated_at
+    updated_user = await UserService.update(db_session, user.id, {"role": "ADMIN"})
+    assert updated_user.role == UserRole.ADMIN
+    assert updated_user.role.name == "ADMIN"
+    assert updated_user.updated_at > previous_updated_at
+
 # Test updating a user with invalid data
 async def test_update_user_invalid_data(db_session, user):
     updated_user = await UserService.update(db_session, user.id, {"email": "invalidemail"})
     assert updated_user is None
 
+# Test updating a user to an email another user already has
+async def test_update_user_duplicate_email(db_session, user, verified_user):
+    with pytest.raises(DuplicateUserError):
+        await UserService.update(db_session, user.id, {"email": verified_user.email})
+    # Only the savepoint was rolled back; the session stays usable.
+    assert await UserService.get_by_id(db_session, user.id) is not None
+
+# Test updating a required field to null
+async def test_update_user_null_role(db_session, user):
+    with pytest.raises(InvalidUserDataError):
+        await UserService.update(db_session, user.id, {"first_name": "John", "role": None})
+
 # Test deleting a user who exists
 async def test_delete_user_exists(db_session, user):
     deletion_success = await UserService.delete(db_session, user.id)
@@ -92,25 +146,33 @@ async def test_list_users_with_pagination(db_session, users_with_same_role_50_us
     assert len(users_page_2) == 10
     assert users_page_1[0].id != users_page_2[0].id
 
+# Test listing users with keyset pagination
+async def test_list_users_with_keyset_pagination(db_session, users_with_same_role_50_users):
+    users_page_1 = await UserService.list_users(db_session, limit=10)
+    users_page_2 = await UserService.list_users(db_session, limit=10, after_id=users_page_1[-1].id)
+    offset_page_2 = await UserService.list_users(db_session, skip=10, limit=10)
+    assert len(users_page_2) == 10
+    assert [u.id for u in users_page_2] == [u.id for u in offset_page_2]
+
 # Test registering a user with valid data
-async def test_register_user_with_valid_data(db_session, email_service):
+async def test_register_user_with_valid_data(db_session):
     user_data = {
         "nickname": generate_nickname(),
         "email": "register_valid_user@example.com",
         "password": "RegisterValid123!",
         "role": UserRole.ADMIN
     }
-    user = await UserService.register_user(db_session, user_data, email_service)
+    user = await UserService.register_user(db_session, user_data)
     assert user is not None
     assert user.email == user_data["email"]
 
 # Test attempting to register a user with invalid data
-async def test_register_user_with_invalid_data(db_session, email_service):
+async def test_register_user_with_invalid_data(db_session):
     user_data = {
         "email": "registerinvalidemail",  # Invalid email
         "password": "short",  # Invalid password
     }
-    user = await UserService.register_user(db_session, user_data, email_service)
+    user = await UserService.register_user(db_session, user_data)
     assert user is None
 
 # Test successful user login
@@ -122,6 +184,30 @@ async def test_login_user_successful(db_session, verified_user):
     logged_in_user = await UserService.login_user(db_session, user_data["email"], user_data["password"])
     assert logged_in_user is not None
 
+# Test that a legacy bcrypt hash is upgraded to argon2id on successful login
+async def test_login_user_rehashes_legacy_password(db_session, verified_user):
+    verified_user.hashed_password = bcrypt.hashpw(b"MySuperPassword$1234", bcrypt.gensalt(rounds=4)).decode('utf-8')
+    await db_session.commit()
+    logged_in_user = await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234")
+    assert logged_in_user is not None
+    assert logged_in_user.hashed_password.startswith('$argon2id$')
+    assert verify_password("MySuperPassword$1234", logged_in_user.hashed_password)
+
+# Test that the user returned by login only exposes the authentication columns
+async def test_login_user_returns_auth_columns_only(db_session):
+    user_data = {
+        "email": "auth_columns@example.com",
+        "password": "ValidPassword123!",
+        "role": UserRole.ADMIN.name
+    }
+    await UserService.create(db_session, user_data)
+    await db_session.commit()
+    db_session.expunge_all()
+    logged_in_user = await UserService.login_user(db_session, user_data["email"], user_data["password"])
+    assert logged_in_user.email == user_data["email"]
+    with pytest.raises(InvalidRequestError):
+        logged_in_user.nickname
+
 # Test user login with incorrect email
 async def test_login_user_incorrect_email(db_session):
     user = await UserService.login_user(db_session, "nonexistentuser@noway.com", "Password123!")
@@ -155,6 +241,15 @@ async def test_verify_email_with_token(db_session, user):
     result = await UserService.verify_email_with_token(db_session, user.id, token)
     assert result is True
 
+# Test verifying a user's email with a wrong token
+async def test_verify_email_with_invalid_token(db_session, user):
+    user.verification_token = "valid_token_example"
+    await db_session.commit()
+    result = await UserService.verify_email_with_token(db_session, user.id, "wrong_token_example")
+    assert result is False
+    refreshed_user = await UserService.get_by_id(db_session, user.id)
+    assert refreshed_user.email_verified is False
+
 # Test unlocking a user's account
 async def test_unlock_user_account(db_session, locked_user):
     unlocked = await UserService.unlock_user_account(db_session, locked_user.id)